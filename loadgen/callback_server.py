@@ -1,39 +1,80 @@
+import asyncio
 import time
-from threading import Lock
 
-from fastapi import FastAPI, Request
+import orjson
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
 
-app = FastAPI()
+# Callback storage, split into shards keyed by hash(request_id) so that each shard
+# stays small and can be given its own lock if the receiver ever runs multiple
+# writers. Today it is written only from the server's event-loop thread; each
+# callback inserts a distinct key, which is atomic under the GIL, so no lock is
+# needed. Readers take a snapshot copy of every shard for safe iteration.
+_SHARDS = 16
+_received: list[dict[str, float]] = [{} for _ in range(_SHARDS)]  # id -> monotonic
+_received_wall_ns: list[dict[str, int]] = [{} for _ in range(_SHARDS)]  # id -> time_ns()
 
-# Thread-safe storage for received callbacks
-_lock = Lock()
-_received: dict[str, float] = {}  # request_id -> received_timestamp (monotonic)
-_received_wall: dict[str, float] = {}  # request_id -> wall clock timestamp
+# Completion signal for the runner: (runner loop, event, request_ids still outstanding)
+_waiter: tuple[asyncio.AbstractEventLoop, asyncio.Event, set[str]] | None = None
 
 
-@app.post("/callback")
-async def receive_callback(request: Request) -> dict:
-    body = await request.json()
+async def receive_callback(request: Request) -> Response:
+    body = orjson.loads(await request.body())
     request_id = body.get("request_id", "unknown")
-    now_mono = time.monotonic()
-    now_wall = time.time()
-    with _lock:
-        _received[request_id] = now_mono
-        _received_wall[request_id] = now_wall
-    return {"status": "received", "request_id": request_id}
+    shard = hash(request_id) & (_SHARDS - 1)
+    _received[shard][request_id] = time.monotonic()
+    _received_wall_ns[shard][request_id] = time.time_ns()
+
+    waiter = _waiter
+    if waiter is not None:
+        loop, event, pending = waiter
+        pending.discard(request_id)
+        if not pending:
+            # The runner's loop lives in another thread
+            loop.call_soon_threadsafe(event.set)
+    return Response(
+        orjson.dumps({"status": "received", "request_id": request_id}),
+        media_type="application/json",
+    )
+
+
+# Plain Starlette route: no dependency resolution or pydantic on the receive path
+app = Starlette(routes=[Route("/callback", receive_callback, methods=["POST"])])
+
+
+def _merge[T](shards: list[dict[str, T]]) -> dict[str, T]:
+    merged: dict[str, T] = {}
+    for shard in shards:
+        merged.update(shard.copy())
+    return merged
 
 
 def get_received() -> dict[str, float]:
-    with _lock:
-        return dict(_received)
+    return _merge(_received)
+
+
+def get_received_wall_ns() -> dict[str, int]:
+    return _merge(_received_wall_ns)
 
 
-def get_received_wall() -> dict[str, float]:
-    with _lock:
-        return dict(_received_wall)
+def register_expected(request_ids: set[str]) -> asyncio.Event:
+    """Return an event, bound to the caller's loop, set once every id has called back."""
+    global _waiter
+    event = asyncio.Event()
+    pending = set(request_ids)
+    _waiter = (asyncio.get_running_loop(), event, pending)
+    # Publish the waiter first, then account for callbacks that already landed
+    for shard in _received:
+        pending.difference_update(shard.copy())
+    if not pending:
+        event.set()
+    return event
 
 
 def clear_received() -> None:
-    with _lock:
-        _received.clear()
-        _received_wall.clear()
+    global _received, _received_wall_ns, _waiter
+    _received = [{} for _ in range(_SHARDS)]
+    _received_wall_ns = [{} for _ in range(_SHARDS)]
+    _waiter = None
@@ -1,8 +1,11 @@
 import asyncio
+import sys
 import threading
+import time
 from collections import Counter
 
 import click
+import httpx
 import uvicorn
 from rich.console import Console
 
@@ -10,16 +13,100 @@ from loadgen.callback_server import app as callback_app
 from loadgen.runner import run_async_test, run_sync_test
 from loadgen.stats import compute_percentiles, print_report
 
+# uvloop (libuv) schedules tasks and socket callbacks much faster than the default
+# selector loop; it is not available on Windows.
+_USE_UVLOOP = sys.platform != "win32"
+if _USE_UVLOOP:
+    import uvloop
+
 
 def _start_callback_server(port: int) -> threading.Thread:
-    """Start the callback server in a background thread."""
-    config = uvicorn.Config(callback_app, host="0.0.0.0", port=port, log_level="warning")
+    """Start the callback server in a background thread and wait until it is listening."""
+    config = uvicorn.Config(
+        callback_app,
+        host="0.0.0.0",
+        port=port,
+        log_level="warning",
+        loop="uvloop" if _USE_UVLOOP else "asyncio",
+        http="httptools",
+    )
     server = uvicorn.Server(config)
     thread = threading.Thread(target=server.run, daemon=True)
     thread.start()
+    # Poll the server's own readiness flag rather than sleeping a fixed second
+    while not server.started:
+        if not thread.is_alive():
+            raise click.ClickException(f"Callback server failed to start on port {port}")
+        time.sleep(0.01)
     return thread
 
 
+def _build_client(concurrency: int, timeout: float) -> httpx.AsyncClient:
+    """One pooled client for the whole run, sized so the pool is never the bottleneck."""
+    limits = httpx.Limits(
+        max_connections=concurrency * 2,
+        max_keepalive_connections=concurrency,
+        keepalive_expiry=60,
+    )
+    return httpx.AsyncClient(limits=limits, http2=True, timeout=timeout)
+
+
+async def _run_tests(
+    console: Console,
+    server_url: str,
+    num_requests: int,
+    concurrency: int,
+    mode: str,
+    iterations: int,
+    callback_url: str,
+    timeout: float,
+) -> None:
+    """Run the selected tests on one event loop, sharing a single connection pool."""
+    sync_stats = None
+    async_accept_stats = None
+    async_callback_stats = None
+    sync_errors = 0
+    async_errors = 0
+    missing_callbacks = 0
+    all_error_details: Counter = Counter()
+
+    async with _build_client(concurrency, timeout) as client:
+        if mode in ("sync", "both"):
+            console.print("[bold red]Running sync test...[/bold red]")
+            latencies, sync_errors, sync_err_details = await run_sync_test(
+                client, server_url, num_requests, concurrency, iterations
+            )
+            all_error_details.update(sync_err_details)
+            sync_stats = compute_percentiles(latencies)
+            console.print(f"  Done: {len(latencies)} successful, {sync_errors} errors")
+            if sync_err_details:
+                for err, count in sync_err_details.most_common():
+                    console.print(f"    [dim]{count}x {err}[/dim]")
+
+        if mode in ("async", "both"):
+            console.print("[bold green]Running async test...[/bold green]")
+            accept_lat, cb_lat, async_errors, missing_callbacks, async_err_details = (
+                await run_async_test(
+                    client, server_url, num_requests, concurrency, iterations, callback_url
+                )
+            )
+            all_error_details.update(async_err_details)
+            async_accept_stats = compute_percentiles(accept_lat)
+            async_callback_stats = compute_percentiles(cb_lat)
+            console.print(
+                f"  Done: {len(accept_lat)} accepted, {len(cb_lat)} callbacks received, "
+                f"{async_errors} errors, {missing_callbacks} missing"
+            )
+            if async_err_details:
+                for err, count in async_err_details.most_common():
+                    console.print(f"    [dim]{count}x {err}[/dim]")
+
+    print_report(
+        sync_stats, async_accept_stats, async_callback_stats,
+        sync_errors, async_errors, missing_callbacks,
+    )
+
+
 @click.command()
 @click.option("--server-url", default="http://localhost:8000", help="Base URL of the API server")
 @click.option("--num-requests", default=100, help="Number of requests to send")
@@ -49,52 +136,15 @@ def main(
     if mode in ("async", "both"):
         console.print(f"Starting callback server on port {callback_port}...")
         _start_callback_server(callback_port)
-        import time
-        time.sleep(1)  # give it a moment to start
 
     callback_url = f"http://localhost:{callback_port}/callback"
 
-    sync_stats = None
-    async_accept_stats = None
-    async_callback_stats = None
-    sync_errors = 0
-    async_errors = 0
-    missing_callbacks = 0
-    all_error_details: Counter = Counter()
-
-    if mode in ("sync", "both"):
-        console.print("[bold red]Running sync test...[/bold red]")
-        latencies, sync_errors, sync_err_details = asyncio.run(
-            run_sync_test(server_url, num_requests, concurrency, iterations, timeout)
-        )
-        all_error_details.update(sync_err_details)
-        sync_stats = compute_percentiles(latencies)
-        console.print(f"  Done: {len(latencies)} successful, {sync_errors} errors")
-        if sync_err_details:
-            for err, count in sync_err_details.most_common():
-                console.print(f"    [dim]{count}x {err}[/dim]")
-
-    if mode in ("async", "both"):
-        console.print("[bold green]Running async test...[/bold green]")
-        accept_lat, cb_lat, async_errors, missing_callbacks, async_err_details = asyncio.run(
-            run_async_test(
-                server_url, num_requests, concurrency, iterations, callback_url, timeout
-            )
-        )
-        all_error_details.update(async_err_details)
-        async_accept_stats = compute_percentiles(accept_lat)
-        async_callback_stats = compute_percentiles(cb_lat)
-        console.print(
-            f"  Done: {len(accept_lat)} accepted, {len(cb_lat)} callbacks received, "
-            f"{async_errors} errors, {missing_callbacks} missing"
-        )
-        if async_err_details:
-            for err, count in async_err_details.most_common():
-                console.print(f"    [dim]{count}x {err}[/dim]")
-
-    print_report(
-        sync_stats, async_accept_stats, async_callback_stats,
-        sync_errors, async_errors, missing_callbacks,
+    asyncio.run(
+        _run_tests(
+            console, server_url, num_requests, concurrency, mode, iterations,
+            callback_url, timeout,
+        ),
+        loop_factory=uvloop.new_event_loop if _USE_UVLOOP else None,
     )
 
 
@@ -1,154 +1,172 @@
 import asyncio
 import time
 from collections import Counter
+from collections.abc import Awaitable, Callable
 
 import httpx
+import numpy as np
+import orjson
 
-from loadgen.callback_server import clear_received, get_received_wall
+from loadgen.callback_server import clear_received, get_received_wall_ns, register_expected
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+async def _run_pool(
+    num_requests: int, concurrency: int, send_one: Callable[[int], Awaitable[str | None]]
+) -> Counter:
+    """Run send_one(i) for every request index on `concurrency` long-lived workers.
+
+    Returns a Counter of the error keys reported by send_one.
+    """
+    queue: asyncio.Queue[int | None] = asyncio.Queue()
+    for i in range(num_requests):
+        queue.put_nowait(i)
+    for _ in range(concurrency):
+        queue.put_nowait(None)  # one stop sentinel per worker
+
+    async def worker() -> Counter:
+        errors: Counter = Counter()
+        while (i := await queue.get()) is not None:
+            err = await send_one(i)
+            if err is not None:
+                errors[err] += 1
+        return errors
+
+    error_details: Counter = Counter()
+    for worker_errors in await asyncio.gather(*(worker() for _ in range(concurrency))):
+        error_details.update(worker_errors)
+    return error_details
 
 
 async def run_sync_test(
+    client: httpx.AsyncClient,
     server_url: str,
     num_requests: int,
     concurrency: int,
     iterations: int,
-    timeout: float,
-) -> tuple[list[float], int, Counter]:
-    """Fire N sync requests with bounded concurrency.
+) -> tuple[np.ndarray, int, Counter]:
+    """Fire N sync requests with bounded concurrency over a shared client.
 
     Returns (latencies_ms, error_count, error_details).
     error_details is a Counter of "status_code: reason" strings.
     """
-    semaphore = asyncio.Semaphore(concurrency)
-    latencies: list[float] = []
-    errors = 0
-    error_details: Counter = Counter()
-    lock = asyncio.Lock()
-
-    async def send_one(i: int, client: httpx.AsyncClient) -> None:
-        nonlocal errors
-        async with semaphore:
-            start = time.monotonic()
-            try:
-                resp = await client.post(
-                    f"{server_url}/sync",
-                    json={"input_data": f"test-sync-{i}", "iterations": iterations},
-                    timeout=timeout,
-                )
-                elapsed = round((time.monotonic() - start) * 1000, 2)
-                if resp.status_code == 200:
-                    async with lock:
-                        latencies.append(elapsed)
-                else:
-                    detail = _extract_error(resp)
-                    async with lock:
-                        errors += 1
-                        error_details[f"{resp.status_code}: {detail}"] += 1
-            except httpx.TimeoutException:
-                async with lock:
-                    errors += 1
-                    error_details["timeout"] += 1
-            except Exception as e:
-                async with lock:
-                    errors += 1
-                    error_details[f"exception: {type(e).__name__}"] += 1
-
-    async with httpx.AsyncClient() as client:
-        tasks = [send_one(i, client) for i in range(num_requests)]
-        await asyncio.gather(*tasks)
-
-    return latencies, errors, error_details
+    # Render every request body up front so the concurrent loop only ships bytes
+    payloads = [
+        orjson.dumps({"input_data": f"test-sync-{i}", "iterations": iterations})
+        for i in range(num_requests)
+    ]
+
+    # Index i is sent exactly once, so results are written in place without any locking.
+    # Latencies are integer nanoseconds; -1 marks a request that did not succeed.
+    latencies_ns = np.full(num_requests, -1, dtype=np.int64)
+
+    async def send_one(i: int) -> str | None:
+        """Record the latency in slot i; return an error key on failure."""
+        start_ns = time.monotonic_ns()
+        try:
+            resp = await client.post(
+                f"{server_url}/sync", content=payloads[i], headers=_JSON_HEADERS
+            )
+            elapsed_ns = time.monotonic_ns() - start_ns
+            if resp.status_code == 200:
+                latencies_ns[i] = elapsed_ns
+                return None
+            return f"{resp.status_code}: {_extract_error(resp)}"
+        except httpx.TimeoutException:
+            return "timeout"
+        except Exception as e:
+            return f"exception: {type(e).__name__}"
+
+    error_details = await _run_pool(num_requests, concurrency, send_one)
+    errors = sum(error_details.values())
+    return _ns_to_ms(latencies_ns[latencies_ns >= 0]), errors, error_details
 
 
 async def run_async_test(
+    client: httpx.AsyncClient,
     server_url: str,
     num_requests: int,
     concurrency: int,
     iterations: int,
     callback_url: str,
-    timeout: float,
     callback_wait: float = 60.0,
-) -> tuple[list[float], list[float], int, int, Counter]:
-    """Fire N async requests and wait for callbacks.
+) -> tuple[np.ndarray, np.ndarray, int, int, Counter]:
+    """Fire N async requests over a shared client and wait for callbacks.
 
     Returns (accept_latencies_ms, callback_latencies_ms, error_count, missing_callbacks, error_details).
     """
     clear_received()
-    semaphore = asyncio.Semaphore(concurrency)
-    accept_latencies: list[float] = []
-    send_times: dict[str, float] = {}  # request_id -> wall clock send time
-    errors = 0
-    error_details: Counter = Counter()
-    lock = asyncio.Lock()
-
-    async def send_one(i: int, client: httpx.AsyncClient) -> None:
-        nonlocal errors
-        async with semaphore:
-            send_wall = time.time()
-            start = time.monotonic()
-            try:
-                resp = await client.post(
-                    f"{server_url}/async",
-                    json={
-                        "input_data": f"test-async-{i}",
-                        "iterations": iterations,
-                        "callback_url": callback_url,
-                    },
-                    timeout=timeout,
-                )
-                elapsed = round((time.monotonic() - start) * 1000, 2)
-                if resp.status_code == 202:
-                    body = resp.json()
-                    request_id = body["request_id"]
-                    async with lock:
-                        accept_latencies.append(elapsed)
-                        send_times[request_id] = send_wall
-                else:
-                    detail = _extract_error(resp)
-                    async with lock:
-                        errors += 1
-                        error_details[f"{resp.status_code}: {detail}"] += 1
-            except httpx.TimeoutException:
-                async with lock:
-                    errors += 1
-                    error_details["timeout"] += 1
-            except Exception as e:
-                async with lock:
-                    errors += 1
-                    error_details[f"exception: {type(e).__name__}"] += 1
-
-    async with httpx.AsyncClient() as client:
-        tasks = [send_one(i, client) for i in range(num_requests)]
-        await asyncio.gather(*tasks)
+    payloads = [
+        orjson.dumps({
+            "input_data": f"test-async-{i}",
+            "iterations": iterations,
+            "callback_url": callback_url,
+        })
+        for i in range(num_requests)
+    ]
+
+    # Parallel per-request columns; slot i is written only while sending request i
+    accept_latencies_ns = np.full(num_requests, -1, dtype=np.int64)
+    send_walls_ns = np.empty(num_requests, dtype=np.int64)
+    request_ids = np.empty(num_requests, dtype=object)
+
+    async def send_one(i: int) -> str | None:
+        """Fill slot i (send time, request id, accept latency); return an error key on failure."""
+        send_walls_ns[i] = time.time_ns()
+        start_ns = time.monotonic_ns()
+        try:
+            resp = await client.post(
+                f"{server_url}/async", content=payloads[i], headers=_JSON_HEADERS
+            )
+            elapsed_ns = time.monotonic_ns() - start_ns
+            if resp.status_code == 202:
+                request_ids[i] = orjson.loads(resp.content)["request_id"]
+                accept_latencies_ns[i] = elapsed_ns
+                return None
+            return f"{resp.status_code}: {_extract_error(resp)}"
+        except httpx.TimeoutException:
+            return "timeout"
+        except Exception as e:
+            return f"exception: {type(e).__name__}"
+
+    error_details = await _run_pool(num_requests, concurrency, send_one)
+    errors = sum(error_details.values())
+    accepted = accept_latencies_ns >= 0
 
     # Wait for callbacks to arrive
-    expected = len(send_times)
-    if expected > 0:
-        deadline = time.monotonic() + callback_wait
-        while time.monotonic() < deadline:
-            received = get_received_wall()
-            if len(received) >= expected:
-                break
-            await asyncio.sleep(0.1)
-
-    # Compute callback latencies (wall clock: send_time -> callback_received_time)
-    received = get_received_wall()
-    callback_latencies: list[float] = []
-    missing = 0
-    for request_id, send_time in send_times.items():
-        if request_id in received:
-            cb_latency = round((received[request_id] - send_time) * 1000, 2)
-            callback_latencies.append(cb_latency)
-        else:
-            missing += 1
-
+    if accepted.any():
+        all_received = register_expected(set(request_ids[accepted]))
+        try:
+            await asyncio.wait_for(all_received.wait(), timeout=callback_wait)
+        except asyncio.TimeoutError:
+            pass  # whatever is still outstanding is counted as missing below
+
+    # Compute callback latencies (wall clock: send_time -> callback_received_time).
+    # Scatter receive times into a column parallel to send_walls_ns, then subtract in one go.
+    recv_walls_ns = np.full(num_requests, -1, dtype=np.int64)
+    index_of = {request_ids[i]: i for i in np.flatnonzero(accepted)}
+    for request_id, received_ns in get_received_wall_ns().items():
+        i = index_of.get(request_id)
+        if i is not None:
+            recv_walls_ns[i] = received_ns
+    got_callback = recv_walls_ns >= 0
+    callback_latencies = _ns_to_ms(recv_walls_ns[got_callback] - send_walls_ns[got_callback])
+    missing = int(accepted.sum() - got_callback.sum())
+
+    accept_latencies = _ns_to_ms(accept_latencies_ns[accepted])
     return accept_latencies, callback_latencies, errors, missing, error_details
 
 
+def _ns_to_ms(latencies_ns: np.ndarray) -> np.ndarray:
+    """Convert integer nanosecond latencies to float milliseconds for reporting."""
+    return latencies_ns.astype(np.float64) / 1e6
+
+
 def _extract_error(resp: httpx.Response) -> str:
     """Extract a short error description from an HTTP response."""
     try:
-        body = resp.json()
+        body = orjson.loads(resp.content)
         if "detail" in body:
             msg = str(body["detail"])
             return msg[:80]
@@ -1,33 +1,44 @@
-import statistics
-
-from rich.console import Console
+import numpy as np
+from rich.console import Console, Group, RenderableType
 from rich.panel import Panel
+from rich.rule import Rule
 from rich.table import Table
+from rich.text import Text
 
 
-def compute_percentiles(latencies: list[float]) -> dict:
-    if not latencies:
+def compute_percentiles(latencies: np.ndarray | list[float]) -> dict:
+    arr = np.asarray(latencies, dtype=np.float64)
+    arr = arr[~np.isnan(arr)]
+    if arr.size == 0:
         return {"p50": 0, "p95": 0, "p99": 0, "min": 0, "max": 0, "mean": 0, "count": 0}
-    sorted_lat = sorted(latencies)
-    n = len(sorted_lat)
+    # Linear interpolation between closest ranks (numpy's default), so p95/p99 are not
+    # biased towards the next-higher sample on small runs
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99]).tolist()
     return {
-        "p50": sorted_lat[int(n * 0.50)],
-        "p95": sorted_lat[int(n * 0.95)] if n > 1 else sorted_lat[0],
-        "p99": sorted_lat[int(n * 0.99)] if n > 1 else sorted_lat[0],
-        "min": sorted_lat[0],
-        "max": sorted_lat[-1],
-        "mean": round(statistics.mean(sorted_lat), 2),
-        "count": n,
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+        "min": arr.min().item(),
+        "max": arr.max().item(),
+        "mean": round(arr.mean().item(), 2),
+        "count": arr.size,
     }
 
 
-def _bar(value: float, max_value: float, width: int = 30) -> str:
-    """Create a simple ASCII bar for visual comparison."""
-    if max_value == 0:
-        return ""
-    filled = int((value / max_value) * width)
-    filled = max(1, min(filled, width))
-    return "\u2588" * filled + "\u2591" * (width - filled)
+def _bars(values: np.ndarray, width: int = 30) -> np.ndarray:
+    """ASCII bars for visual comparison, one per value, each row scaled to its own max.
+
+    values has shape (percentiles, modes); returns an array of bar strings of the same shape.
+    """
+    max_vals = values.max(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        filled = np.where(max_vals > 0, values / max_vals * width, 0).astype(int)
+    filled = np.clip(filled, 1, width)
+    bars = np.array(
+        ["\u2588" * f + "\u2591" * (width - f) for f in filled.ravel()], dtype=object
+    ).reshape(values.shape)
+    bars[np.broadcast_to(max_vals == 0, values.shape)] = ""
+    return bars
 
 
 def print_report(
@@ -38,10 +49,12 @@ def print_report(
     async_errors: int = 0,
     async_missing_callbacks: int = 0,
 ) -> None:
-    console = Console()
-    console.print()
-    console.rule("[bold blue]Load Test Results[/bold blue]")
-    console.print()
+    # Everything is collected into one Group and rendered with a single print
+    parts: list[RenderableType] = [
+        Text(),
+        Rule("[bold blue]Load Test Results[/bold blue]"),
+        Text(),
+    ]
 
     # --- Latency comparison table ---
     table = Table(title="Latency Comparison (ms)", show_lines=True)
@@ -64,7 +77,7 @@ def print_report(
             row.append(f"{async_callback_stats.get(m, 0):.1f}" if m != "count" else str(async_callback_stats.get(m, 0)))
         table.add_row(*row)
 
-    console.print(table)
+    parts.append(table)
 
     # --- Error summary ---
     error_table = Table(title="Error Summary", show_lines=True)
@@ -75,36 +88,33 @@ def print_report(
     if async_accept_stats is not None:
         error_table.add_row("Async errors", str(async_errors))
         error_table.add_row("Missing callbacks", str(async_missing_callbacks))
-    console.print(error_table)
+    parts.append(error_table)
 
     # --- Visual bar comparison of P50, P95, P99 ---
     if sync_stats and async_accept_stats and sync_stats["count"] > 0 and async_accept_stats["count"] > 0:
-        has_callback = async_callback_stats and async_callback_stats["count"] > 0
-
-        for percentile in ("p50", "p95", "p99"):
-            console.print()
-            values = [sync_stats[percentile], async_accept_stats[percentile]]
-            if has_callback:
-                values.append(async_callback_stats[percentile])
-            max_val = max(values) if values else 1
-
-            console.print(f"[bold]{percentile.upper()} Latency Visual Comparison:[/bold]")
-            console.print(
-                f"  Sync response:  {_bar(sync_stats[percentile], max_val)} {sync_stats[percentile]:.0f}ms",
-                style="red",
-            )
-            console.print(
-                f"  Async accept:   {_bar(async_accept_stats[percentile], max_val)} {async_accept_stats[percentile]:.0f}ms",
-                style="green",
+        series = [
+            ("Sync response: ", sync_stats, "red"),
+            ("Async accept:  ", async_accept_stats, "green"),
+        ]
+        if async_callback_stats and async_callback_stats["count"] > 0:
+            series.append(("Async callback:", async_callback_stats, "cyan"))
+
+        percentiles = ("p50", "p95", "p99")
+        values = np.array(
+            [[stats[p] for _, stats, _ in series] for p in percentiles], dtype=np.float64
+        )
+        bars = _bars(values)
+
+        for pi, percentile in enumerate(percentiles):
+            parts.append(Text())
+            parts.append(
+                Text.from_markup(f"[bold]{percentile.upper()} Latency Visual Comparison:[/bold]")
             )
-            if has_callback:
-                console.print(
-                    f"  Async callback: {_bar(async_callback_stats[percentile], max_val)} {async_callback_stats[percentile]:.0f}ms",
-                    style="cyan",
-                )
+            for si, (label, _, style) in enumerate(series):
+                parts.append(Text(f"  {label} {bars[pi, si]} {values[pi, si]:.0f}ms", style=style))
 
     # --- Insight panel ---
-    console.print()
+    parts.append(Text())
     insights = []
 
     if sync_stats and sync_stats["count"] > 0 and async_accept_stats and async_accept_stats["count"] > 0:
@@ -140,6 +150,8 @@ def print_report(
             insights.append(f"Async error rate: {error_rate:.1f}%")
 
     if insights:
-        console.print(Panel("\n".join(f"  {i+1}. {insight}" for i, insight in enumerate(insights)),
-                            title="[bold]Key Insights[/bold]", border_style="blue"))
-    console.print()
+        parts.append(Panel("\n".join(f"  {i+1}. {insight}" for i, insight in enumerate(insights)),
+                           title="[bold]Key Insights[/bold]", border_style="blue"))
+    parts.append(Text())
+
+    Console().print(Group(*parts))
@@ -8,7 +8,7 @@ from urllib.parse import urlparse
 import httpx
 
 from app.config import settings
-from app.database import insert_callback_attempt, update_callback_status
+from app.database import finalize_callback
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +24,27 @@ _PRIVATE_NETWORKS = [
     ipaddress.ip_network("fe80::/10"),
 ]
 
+# Networks as (network_int, netmask_int), per IP version, so membership is one
+# AND + compare on plain ints instead of ipaddress containment checks
+_PRIVATE_BY_VERSION = {
+    version: [
+        (int(net.network_address), int(net.netmask))
+        for net in _PRIVATE_NETWORKS if net.version == version
+    ]
+    for version in (4, 6)
+}
+
+# hostname -> (resolved_at monotonic, resolved IPs). Only used for request-time
+# validation; delivery-time validation always re-resolves.
+_DNS_CACHE_TTL = 30.0
+_DNS_CACHE_MAX_ENTRIES = 1024
+_dns_cache: dict[str, tuple[float, list[str]]] = {}
+
+# Shared delivery client so retries and concurrent deliveries reuse pooled
+# keep-alive connections (and, for https receivers that negotiate it, one
+# multiplexed HTTP/2 connection). Created lazily on the running loop.
+_client: httpx.AsyncClient | None = None
+
 
 class SSRFError(Exception):
     pass
@@ -34,13 +55,34 @@ def _is_private_ip(ip_str: str) -> bool:
         addr = ipaddress.ip_address(ip_str)
     except ValueError:
         return True  # treat unparseable as private (safe default)
-    return any(addr in net for net in _PRIVATE_NETWORKS)
-
-
-def validate_callback_url(url: str) -> None:
+    ip_int = int(addr)
+    for net_int, mask in _PRIVATE_BY_VERSION[addr.version]:
+        if ip_int & mask == net_int:
+            return True
+    return False
+
+
+def _resolve(hostname: str, port: int, use_cache: bool) -> list[str]:
+    """Resolve hostname to IP strings, reusing results younger than _DNS_CACHE_TTL."""
+    now = time.monotonic()
+    if use_cache:
+        cached = _dns_cache.get(hostname)
+        if cached is not None and now - cached[0] < _DNS_CACHE_TTL:
+            return cached[1]
+
+    results = socket.getaddrinfo(hostname, port, proto=socket.IPPROTO_TCP)
+    ips = [sockaddr[0] for _family, _type, _proto, _canonname, sockaddr in results]
+    if len(_dns_cache) >= _DNS_CACHE_MAX_ENTRIES:
+        _dns_cache.clear()
+    _dns_cache[hostname] = (now, ips)
+    return ips
+
+
+def validate_callback_url(url: str, use_dns_cache: bool = True) -> None:
     """Validate callback URL scheme and resolve DNS to check for private IPs.
 
-    Raises SSRFError if the URL targets a private/internal address.
+    Raises SSRFError if the URL targets a private/internal address. Pass
+    use_dns_cache=False to force a fresh lookup.
     """
     parsed = urlparse(url)
     if parsed.scheme not in ("http", "https"):
@@ -52,13 +94,12 @@ def validate_callback_url(url: str) -> None:
 
     # Resolve DNS and check all addresses
     try:
-        results = socket.getaddrinfo(hostname, parsed.port or 80, proto=socket.IPPROTO_TCP)
+        ips = _resolve(hostname, parsed.port or 80, use_dns_cache)
     except socket.gaierror as e:
         raise SSRFError(f"DNS resolution failed for {hostname}: {e}")
 
     if not settings.allow_private_callbacks:
-        for family, _type, _proto, _canonname, sockaddr in results:
-            ip = sockaddr[0]
+        for ip in ips:
             if _is_private_ip(ip):
                 raise SSRFError(
                     f"Callback URL resolves to private IP {ip}. "
@@ -66,76 +107,90 @@ def validate_callback_url(url: str) -> None:
                 )
 
 
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=settings.callback_timeout,
+            follow_redirects=False,  # prevent SSRF via redirect
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+            http2=True,  # offered via TLS ALPN only; plain-http receivers stay on HTTP/1.1
+        )
+    return _client
+
+
+async def close_callback_client() -> None:
+    """Close the shared delivery client. Call on shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
 def _revalidate_at_delivery_time(url: str) -> None:
     """Re-validate callback URL at delivery time (DNS rebinding protection)."""
-    validate_callback_url(url)
+    validate_callback_url(url, use_dns_cache=False)
 
 
 async def deliver_callback(
     request_id: str,
     callback_url: str,
-    payload: dict,
+    payload: bytes,
 ) -> None:
     """Deliver callback with exponential backoff + jitter.
 
-    Retries up to callback_max_retries times. Logs every attempt to the
-    callback_attempts table. Does NOT retry SSRF failures (permanent fail).
+    payload is the already-encoded JSON body, sent as-is on every attempt.
+
+    Retries up to callback_max_retries times. Every attempt is recorded in the
+    callback_attempts table, written in one batch with the final callback status
+    once delivery succeeds or gives up. Does NOT retry SSRF failures (permanent fail).
     """
     max_retries = settings.callback_max_retries
     base_delay = 2.0
     max_delay = 60.0
 
+    # Re-validate once at delivery time (DNS rebinding protection); retries reuse the result
+    start_ns = time.monotonic_ns()
+    try:
+        _revalidate_at_delivery_time(callback_url)
+    except SSRFError as e:
+        error_msg = f"SSRF blocked: {e}"
+        attempt_row = (request_id, 1, None, error_msg, _elapsed_ms(start_ns))
+        await _record_delivery(request_id, "failed", 1, error_msg, [attempt_row])
+        logger.warning("SSRF blocked for request %s: %s", request_id, e)
+        return  # permanent fail — do not retry
+
+    attempt_rows: list[tuple] = []
     for attempt in range(1, max_retries + 1):
-        start = time.monotonic()
+        start_ns = time.monotonic_ns()
         status_code = None
         error_msg = None
 
         try:
-            # Re-validate at delivery time (DNS rebinding protection)
-            _revalidate_at_delivery_time(callback_url)
-        except SSRFError as e:
-            error_msg = f"SSRF blocked: {e}"
-            elapsed_ms = round((time.monotonic() - start) * 1000, 2)
-            try:
-                await insert_callback_attempt(request_id, attempt, None, error_msg, elapsed_ms)
-                await update_callback_status(request_id, "failed", attempt, error_msg)
-            except Exception:
-                logger.exception("DB error logging SSRF failure for %s", request_id)
-            logger.warning("SSRF blocked for request %s: %s", request_id, e)
-            return  # permanent fail — do not retry
-
-        try:
-            async with httpx.AsyncClient(
-                timeout=settings.callback_timeout,
-                follow_redirects=False,  # prevent SSRF via redirect
-            ) as client:
-                response = await client.post(
-                    callback_url,
-                    json=payload,
-                    headers={
-                        "X-Request-ID": request_id,
-                        "X-Attempt-Number": str(attempt),
-                        "Content-Type": "application/json",
-                    },
+            response = await _get_client().post(
+                callback_url,
+                content=payload,
+                headers={
+                    "X-Request-ID": request_id,
+                    "X-Attempt-Number": str(attempt),
+                    "Content-Type": "application/json",
+                },
+            )
+            status_code = response.status_code
+            elapsed_ms = _elapsed_ms(start_ns)
+
+            if 200 <= status_code < 300:
+                attempt_rows.append((request_id, attempt, status_code, None, elapsed_ms))
+                await _record_delivery(request_id, "delivered", attempt, None, attempt_rows)
+                # Per-task success line: DEBUG, so production INFO logs carry only
+                # failures and lifecycle events
+                logger.debug(
+                    "Callback delivered for %s on attempt %d (%dms)",
+                    request_id, attempt, elapsed_ms,
                 )
-                status_code = response.status_code
-                elapsed_ms = round((time.monotonic() - start) * 1000, 2)
-
-                if 200 <= status_code < 300:
-                    try:
-                        await insert_callback_attempt(
-                            request_id, attempt, status_code, None, elapsed_ms
-                        )
-                        await update_callback_status(request_id, "delivered", attempt)
-                    except Exception:
-                        logger.exception("DB error logging success for %s", request_id)
-                    logger.info(
-                        "Callback delivered for %s on attempt %d (%dms)",
-                        request_id, attempt, elapsed_ms,
-                    )
-                    return
-                else:
-                    error_msg = f"HTTP {status_code}"
+                return
+            else:
+                error_msg = f"HTTP {status_code}"
 
         except httpx.TimeoutException:
             error_msg = "Timeout"
@@ -144,11 +199,7 @@ async def deliver_callback(
         except Exception as e:
             error_msg = f"Unexpected error: {e}"
 
-        elapsed_ms = round((time.monotonic() - start) * 1000, 2)
-        try:
-            await insert_callback_attempt(request_id, attempt, status_code, error_msg, elapsed_ms)
-        except Exception:
-            logger.exception("DB error logging attempt %d for %s", attempt, request_id)
+        attempt_rows.append((request_id, attempt, status_code, error_msg, _elapsed_ms(start_ns)))
         logger.warning(
             "Callback attempt %d/%d failed for %s: %s",
             attempt, max_retries, request_id, error_msg,
@@ -160,13 +211,29 @@ async def deliver_callback(
             await _sleep(delay + jitter)
 
     # All retries exhausted
+    await _record_delivery(
+        request_id, "failed", max_retries, f"All {max_retries} attempts failed", attempt_rows
+    )
+    logger.error("Callback delivery failed for %s after %d attempts", request_id, max_retries)
+
+
+async def _record_delivery(
+    request_id: str,
+    callback_status: str,
+    attempts: int,
+    error: str | None,
+    attempt_rows: list[tuple],
+) -> None:
+    """Persist a finished delivery's attempts and outcome; DB errors are logged, not raised."""
     try:
-        await update_callback_status(
-            request_id, "failed", max_retries, f"All {max_retries} attempts failed"
-        )
+        await finalize_callback(request_id, callback_status, attempts, error, attempt_rows)
     except Exception:
-        logger.exception("DB error logging final failure for %s", request_id)
-    logger.error("Callback delivery failed for %s after %d attempts", request_id, max_retries)
+        logger.exception("DB error recording callback delivery for %s", request_id)
+
+
+def _elapsed_ms(start_ns: int) -> float:
+    """Milliseconds since start_ns, to 2 decimal places, using integer arithmetic."""
+    return (time.monotonic_ns() - start_ns) // 10_000 / 100
 
 
 async def _sleep(seconds: float) -> None:
@@ -6,6 +6,7 @@ class Settings(BaseSettings):
 
     default_iterations: int = 50_000
     max_workers: int = 4
+    pin_hash_threads: bool = False
     max_queue_size: int = 1000
     callback_timeout: int = 10
     callback_max_retries: int = 5
@@ -13,6 +14,7 @@ class Settings(BaseSettings):
     rate_limit_window: int = 60
     allow_private_callbacks: bool = False
     database_path: str = "requests.db"
+    log_level: str = "INFO"
 
 
 settings = Settings()
@@ -1,9 +1,106 @@
+import asyncio
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+
 import aiosqlite
 
 from app.config import settings
 
 _db: aiosqlite.Connection | None = None
 
+# Read-only connections, one per queue worker. Under WAL each reader sees the last
+# committed snapshot and never waits behind the writer's commit.
+_reader_conns: list[aiosqlite.Connection] = []
+_readers: asyncio.Queue | None = None
+
+# Write-heavy tuning that stays crash-safe under WAL: fsync at checkpoints rather
+# than every commit, memory-mapped reads, in-memory temp tables.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=1073741824",
+)
+
+# Page cache is per connection. The writer gets 64 MiB; each of the max_workers
+# readers gets 8 MiB, since mmap already serves their reads from the OS page cache.
+# Total at the default 4 workers: 64 + 4 * 8 = 96 MiB.
+_WRITER_CACHE_PRAGMA = "PRAGMA cache_size=-65536"
+_READER_CACHE_PRAGMA = "PRAGMA cache_size=-8192"
+
+# Every coroutine shares the one connection, so writers take this lock for the
+# whole BEGIN ... COMMIT; otherwise another coroutine's statements could land in
+# (or its commit() could cut short) an open batch. Created in init_db() on the
+# serving loop.
+_write_lock: asyncio.Lock | None = None
+
+# Statements used by the helpers below. sqlite3's per-connection statement cache
+# (default 128 entries, keyed by SQL text) already compiles each one once and then
+# only re-binds it.
+_INSERT_REQUEST = """INSERT INTO requests (id, mode, input_data, iterations, callback_url)
+           VALUES (?, ?, ?, ?, ?)"""
+
+_UPDATE_REQUEST_RESULT = """UPDATE requests
+           SET status = ?, result = ?, duration_ms = ?, completed_at = datetime('now')
+           WHERE id = ?"""
+
+_UPDATE_CALLBACK_STATUS = """UPDATE requests
+           SET callback_status = ?, callback_attempts = ?, callback_error = ?
+           WHERE id = ?"""
+
+_INSERT_CALLBACK_ATTEMPT = """INSERT INTO callback_attempts (request_id, attempt_number, status_code, error, duration_ms)
+           VALUES (?, ?, ?, ?, ?)"""
+
+# The request's columns followed by the attempt's, one row per attempt, oldest first.
+# A request without attempts yields one row with NULL attempt columns. Attempt columns
+# that clash with request column names are aliased so every row key is unique.
+_SELECT_REQUEST_WITH_ATTEMPTS = """SELECT r.*, a.attempt_number, a.status_code, a.error,
+                  a.duration_ms AS attempt_duration_ms, a.created_at AS attempt_created_at
+           FROM requests r LEFT JOIN callback_attempts a ON a.request_id = r.id
+           WHERE r.id = ? ORDER BY a.attempt_number"""
+
+# Only the RequestSummary columns, in RequestSummary field order
+_LIST_SUMMARIES_BY_MODE = (
+    "SELECT id, mode, status, duration_ms, created_at FROM requests"
+    " WHERE mode = ? ORDER BY created_at DESC LIMIT ? OFFSET ?"
+)
+
+_LIST_SUMMARIES = (
+    "SELECT id, mode, status, duration_ms, created_at FROM requests"
+    " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+)
+
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS requests (
+        id TEXT PRIMARY KEY,
+        mode TEXT NOT NULL,
+        input_data TEXT NOT NULL,
+        iterations INTEGER NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        result TEXT,
+        duration_ms REAL,
+        callback_url TEXT,
+        callback_status TEXT,
+        callback_attempts INTEGER DEFAULT 0,
+        callback_error TEXT,
+        created_at TEXT NOT NULL DEFAULT (datetime('now')),
+        completed_at TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS callback_attempts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        request_id TEXT NOT NULL REFERENCES requests(id),
+        attempt_number INTEGER NOT NULL,
+        status_code INTEGER,
+        error TEXT,
+        duration_ms REAL,
+        created_at TEXT NOT NULL DEFAULT (datetime('now'))
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_requests_mode ON requests(mode)",
+    "CREATE INDEX IF NOT EXISTS idx_requests_status ON requests(status)",
+    "CREATE INDEX IF NOT EXISTS idx_callback_attempts_request_id ON callback_attempts(request_id)",
+)
+
 
 async def get_db() -> aiosqlite.Connection:
     if _db is None:
@@ -11,55 +108,82 @@ async def get_db() -> aiosqlite.Connection:
     return _db
 
 
+@asynccontextmanager
+async def _write_transaction() -> AsyncIterator[aiosqlite.Connection]:
+    """Run the enclosed writes as one BEGIN IMMEDIATE ... COMMIT (one WAL commit)."""
+    db = await get_db()
+    async with _write_lock:  # set alongside _db in init_db()
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            await db.rollback()
+            raise
+        await db.commit()
+
+
+@asynccontextmanager
+async def read_connection() -> AsyncIterator[aiosqlite.Connection]:
+    """Borrow a read-only connection from the pool for the duration of the block."""
+    if _readers is None:
+        raise RuntimeError("Database not initialized — call init_db() first")
+    conn = await _readers.get()
+    try:
+        yield conn
+    finally:
+        _readers.put_nowait(conn)
+
+
+async def _connect(*pragmas: str) -> aiosqlite.Connection:
+    conn = await aiosqlite.connect(settings.database_path)
+    conn.row_factory = aiosqlite.Row
+    for pragma in pragmas:
+        await conn.execute(pragma)
+    return conn
+
+
 async def init_db() -> None:
-    global _db
-    _db = await aiosqlite.connect(settings.database_path)
-    _db.row_factory = aiosqlite.Row
-    await _db.execute("PRAGMA journal_mode=WAL")
-    await _db.execute("PRAGMA busy_timeout=5000")
-    await _db.executescript(
-        """
-        CREATE TABLE IF NOT EXISTS requests (
-            id TEXT PRIMARY KEY,
-            mode TEXT NOT NULL,
-            input_data TEXT NOT NULL,
-            iterations INTEGER NOT NULL,
-            status TEXT NOT NULL DEFAULT 'pending',
-            result TEXT,
-            duration_ms REAL,
-            callback_url TEXT,
-            callback_status TEXT,
-            callback_attempts INTEGER DEFAULT 0,
-            callback_error TEXT,
-            created_at TEXT NOT NULL DEFAULT (datetime('now')),
-            completed_at TEXT
-        );
-
-        CREATE TABLE IF NOT EXISTS callback_attempts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            request_id TEXT NOT NULL REFERENCES requests(id),
-            attempt_number INTEGER NOT NULL,
-            status_code INTEGER,
-            error TEXT,
-            duration_ms REAL,
-            created_at TEXT NOT NULL DEFAULT (datetime('now'))
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_requests_mode ON requests(mode);
-        CREATE INDEX IF NOT EXISTS idx_requests_status ON requests(status);
-        CREATE INDEX IF NOT EXISTS idx_callback_attempts_request_id ON callback_attempts(request_id);
-        """
+    global _db, _write_lock, _readers
+    _db = await _connect(
+        "PRAGMA journal_mode=WAL",
+        *_CONNECTION_PRAGMAS,
+        _WRITER_CACHE_PRAGMA,
+        "PRAGMA wal_autocheckpoint=1000",
     )
-    await _db.commit()
+    _write_lock = asyncio.Lock()
+    # All DDL in one transaction, so a cold start persists the schema with one commit
+    async with _write_transaction() as db:
+        for statement in _SCHEMA:
+            await db.execute(statement)
+    # Let the planner gather stats for the new indexes up front
+    await _db.execute("PRAGMA optimize")
+
+    # Open readers only once the schema exists
+    _readers = asyncio.Queue()
+    for _ in range(settings.max_workers):
+        conn = await _connect(*_CONNECTION_PRAGMAS, _READER_CACHE_PRAGMA, "PRAGMA query_only=1")
+        _reader_conns.append(conn)
+        _readers.put_nowait(conn)
 
 
 async def close_db() -> None:
-    global _db
+    global _db, _readers
+    for conn in _reader_conns:
+        await conn.close()
+    _reader_conns.clear()
+    _readers = None
     if _db is not None:
         await _db.close()
         _db = None
 
 
+async def optimize_db() -> None:
+    """Let SQLite refresh planner statistics for tables whose contents have shifted."""
+    db = await get_db()
+    async with _write_lock:
+        await db.execute("PRAGMA optimize")
+
+
 async def insert_request(
     request_id: str,
     mode: str,
@@ -67,89 +191,52 @@ async def insert_request(
     iterations: int,
     callback_url: str | None = None,
 ) -> None:
-    db = await get_db()
-    await db.execute(
-        """INSERT INTO requests (id, mode, input_data, iterations, callback_url)
-           VALUES (?, ?, ?, ?, ?)""",
-        (request_id, mode, input_data, iterations, callback_url),
-    )
-    await db.commit()
+    async with _write_transaction() as db:
+        await db.execute(
+            _INSERT_REQUEST, (request_id, mode, input_data, iterations, callback_url)
+        )
 
 
 async def update_request_result(
     request_id: str, status: str, result: str, duration_ms: float
 ) -> None:
-    db = await get_db()
-    await db.execute(
-        """UPDATE requests
-           SET status = ?, result = ?, duration_ms = ?, completed_at = datetime('now')
-           WHERE id = ?""",
-        (status, result, duration_ms, request_id),
-    )
-    await db.commit()
+    async with _write_transaction() as db:
+        await db.execute(_UPDATE_REQUEST_RESULT, (status, result, duration_ms, request_id))
 
 
-async def update_callback_status(
-    request_id: str, callback_status: str, attempts: int, error: str | None = None
-) -> None:
-    db = await get_db()
-    await db.execute(
-        """UPDATE requests
-           SET callback_status = ?, callback_attempts = ?, callback_error = ?
-           WHERE id = ?""",
-        (callback_status, attempts, error, request_id),
-    )
-    await db.commit()
-
-
-async def insert_callback_attempt(
+async def finalize_callback(
     request_id: str,
-    attempt_number: int,
-    status_code: int | None,
+    callback_status: str,
+    attempts: int,
     error: str | None,
-    duration_ms: float,
+    attempt_rows: Iterable[tuple],
 ) -> None:
-    db = await get_db()
-    await db.execute(
-        """INSERT INTO callback_attempts (request_id, attempt_number, status_code, error, duration_ms)
-           VALUES (?, ?, ?, ?, ?)""",
-        (request_id, attempt_number, status_code, error, duration_ms),
-    )
-    await db.commit()
-
+    """Write every attempt of a delivery and its final callback status under a single commit.
 
-async def get_request(request_id: str) -> dict | None:
-    db = await get_db()
-    cursor = await db.execute("SELECT * FROM requests WHERE id = ?", (request_id,))
-    row = await cursor.fetchone()
-    if row is None:
-        return None
-    return dict(row)
+    attempt_rows are (request_id, attempt_number, status_code, error, duration_ms).
+    """
+    async with _write_transaction() as db:
+        await db.executemany(_INSERT_CALLBACK_ATTEMPT, attempt_rows)
+        await db.execute(_UPDATE_CALLBACK_STATUS, (callback_status, attempts, error, request_id))
 
 
-async def get_callback_attempts(request_id: str) -> list[dict]:
-    db = await get_db()
-    cursor = await db.execute(
-        "SELECT * FROM callback_attempts WHERE request_id = ? ORDER BY attempt_number",
-        (request_id,),
-    )
-    rows = await cursor.fetchall()
-    return [dict(r) for r in rows]
+# Reads use execute_fetchall so each statement runs to completion and is reset,
+# ending its read transaction instead of pinning an old WAL snapshot. They hand back
+# aiosqlite.Row objects as-is: rows already support row["column"] and ** unpacking,
+# so copying each into a dict buys nothing.
+async def get_request_with_attempts(request_id: str) -> list[aiosqlite.Row]:
+    """Fetch a request joined to its callback attempts in one query; empty if unknown."""
+    async with read_connection() as db:
+        return list(await db.execute_fetchall(_SELECT_REQUEST_WITH_ATTEMPTS, (request_id,)))
 
 
-async def list_requests(
+async def list_request_summaries(
     mode: str | None = None, limit: int = 50, offset: int = 0
-) -> list[dict]:
-    db = await get_db()
-    if mode:
-        cursor = await db.execute(
-            "SELECT * FROM requests WHERE mode = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
-            (mode, limit, offset),
-        )
-    else:
-        cursor = await db.execute(
-            "SELECT * FROM requests ORDER BY created_at DESC LIMIT ? OFFSET ?",
-            (limit, offset),
-        )
-    rows = await cursor.fetchall()
-    return [dict(r) for r in rows]
+) -> list[aiosqlite.Row]:
+    """Newest-first (id, mode, status, duration_ms, created_at) rows."""
+    async with read_connection() as db:
+        if mode:
+            rows = await db.execute_fetchall(_LIST_SUMMARIES_BY_MODE, (mode, limit, offset))
+        else:
+            rows = await db.execute_fetchall(_LIST_SUMMARIES, (limit, offset))
+    return list(rows)
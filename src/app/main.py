@@ -4,7 +4,9 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from app.database import close_db, init_db
+from app.callback import close_callback_client
+from app.config import settings
+from app.database import close_db, init_db, optimize_db
 from app.rate_limit import SlidingWindowRateLimiter, cleanup_stale_entries
 from app.routes.async_route import router as async_router
 from app.routes.health import router as health_router
@@ -15,11 +17,14 @@ import app.task_queue as tq_mod
 from app.task_queue import init_task_queue
 
 logging.basicConfig(
-    level=logging.INFO,
+    level=settings.log_level.upper(),
     format="%(asctime)s %(levelname)s %(name)s: %(message)s",
 )
 logger = logging.getLogger(__name__)
 
+# Run PRAGMA optimize every N cleanup cycles (~15 minutes)
+_OPTIMIZE_EVERY_CYCLES = 15
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -43,18 +48,27 @@ async def lifespan(app: FastAPI):
 
     if tq_mod.task_queue is not None:
         await tq_mod.task_queue.shutdown()
+    await close_callback_client()
     await close_db()
     logger.info("Graceful shutdown complete")
 
 
 async def _periodic_cleanup() -> None:
-    """Clean up stale rate-limiter entries every 60 seconds."""
+    """Clean up stale rate-limiter entries every 60 seconds; optimize the DB periodically."""
+    cycles = 0
     while True:
         await asyncio.sleep(60)
         removed = cleanup_stale_entries()
         if removed > 0:
             logger.debug("Rate limiter cleanup: removed %d stale entries", removed)
 
+        cycles += 1
+        if cycles % _OPTIMIZE_EVERY_CYCLES == 0:
+            try:
+                await optimize_db()
+            except Exception:
+                logger.exception("PRAGMA optimize failed")
+
 
 app = FastAPI(
     title="Sync vs Async API Comparison",
@@ -1,62 +1,118 @@
 import time
-from collections import defaultdict
+import weakref
+from array import array
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse
+import orjson
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.config import settings
 
-# Module-level shared state so the cleanup task can access it
-_requests: dict[str, list[float]] = defaultdict(list)
+_NS_PER_SECOND = 1_000_000_000
 
+_RATE_LIMITED_BODY = orjson.dumps({"detail": "Rate limit exceeded"})
+_RATE_LIMITED_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(_RATE_LIMITED_BODY)).encode()),
+]
 
-class SlidingWindowRateLimiter(BaseHTTPMiddleware):
+
+class IPBucket:
+    """Fixed-size ring of one client's most recent request timestamps (monotonic ns).
+
+    head is the next slot to write; once the ring is full it is also the oldest
+    timestamp, i.e. the max_requests-th most recent request.
+    """
+
+    __slots__ = ("buf", "count", "head")
+
+    def __init__(self, size: int) -> None:
+        self.buf = array("q", bytes(8 * size))
+        self.head = 0
+        self.count = 0
+
+    def newest(self) -> int:
+        return self.buf[self.head - 1]  # head - 1 == -1 wraps to the last slot
+
+
+# Each limiter keeps its buckets in shards keyed by hash(ip), so each dict stays
+# small and resizes independently. Buckets are sized by their limiter's
+# max_requests, so they are never shared between limiters.
+_SHARDS = 16
+
+# Every live limiter, so the periodic cleanup task can reach their buckets
+_limiters: "weakref.WeakSet[SlidingWindowRateLimiter]" = weakref.WeakSet()
+
+
+class SlidingWindowRateLimiter:
     """Sliding window rate limiter, per client IP.
 
-    Uses an in-memory dict of request timestamps. Skips /healthz.
+    Uses an in-memory dict of per-IP timestamp rings. Skips /healthz.
     Returns 429 with Retry-After header when limit exceeded.
+
+    Plain ASGI middleware: rejected requests are answered before the body is
+    read, and admitted ones are passed through without BaseHTTPMiddleware's
+    extra task and stream wrapping.
     """
 
-    def __init__(self, app, max_requests: int | None = None, window_seconds: int | None = None):
-        super().__init__(app)
+    def __init__(
+        self, app: ASGIApp, max_requests: int | None = None, window_seconds: int | None = None
+    ) -> None:
+        self.app = app
         self.max_requests = max_requests or settings.rate_limit_requests
         self.window_seconds = window_seconds or settings.rate_limit_window
+        self._window_ns = self.window_seconds * _NS_PER_SECOND
+        self._shards: list[dict[str, IPBucket]] = [{} for _ in range(_SHARDS)]
+        _limiters.add(self)
 
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path == "/healthz":
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] == "/healthz":
+            await self.app(scope, receive, send)
+            return
 
-        client_ip = request.client.host if request.client else "unknown"
-        now = time.monotonic()
-        cutoff = now - self.window_seconds
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        now = time.monotonic_ns()
+        cutoff = now - self._window_ns
 
-        # Slide the window: drop old timestamps
-        timestamps = _requests[client_ip]
-        _requests[client_ip] = [t for t in timestamps if t > cutoff]
-        timestamps = _requests[client_ip]
+        shard = self._shards[hash(client_ip) & (_SHARDS - 1)]
+        bucket = shard.get(client_ip)
+        if bucket is None:
+            bucket = shard[client_ip] = IPBucket(self.max_requests)
 
-        if len(timestamps) >= self.max_requests:
-            retry_after = int(self.window_seconds - (now - timestamps[0])) + 1
-            return JSONResponse(
-                status_code=429,
-                content={"detail": "Rate limit exceeded"},
-                headers={"Retry-After": str(max(1, retry_after))},
-            )
+        # Over the limit iff the max_requests-th most recent request is still in the window
+        oldest = bucket.buf[bucket.head]
+        if bucket.count == self.max_requests and oldest > cutoff:
+            retry_after = (self._window_ns - (now - oldest)) // _NS_PER_SECOND + 1
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    *_RATE_LIMITED_HEADERS,
+                    (b"retry-after", str(max(1, retry_after)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _RATE_LIMITED_BODY})
+            return
 
-        timestamps.append(now)
-        return await call_next(request)
+        bucket.buf[bucket.head] = now
+        bucket.head = (bucket.head + 1) % self.max_requests
+        if bucket.count < self.max_requests:
+            bucket.count += 1
+        await self.app(scope, receive, send)
 
 
 def cleanup_stale_entries() -> int:
     """Remove entries for IPs with no recent requests. Returns count removed."""
-    now = time.monotonic()
-    window = settings.rate_limit_window
-    cutoff = now - window
-    stale_keys = [
-        ip for ip, timestamps in _requests.items()
-        if not timestamps or all(t <= cutoff for t in timestamps)
-    ]
-    for key in stale_keys:
-        del _requests[key]
-    return len(stale_keys)
+    now = time.monotonic_ns()
+    removed = 0
+    for limiter in list(_limiters):
+        cutoff = now - limiter._window_ns
+        for shard in limiter._shards:
+            stale_keys = [
+                ip for ip, bucket in shard.items()
+                if not bucket.count or bucket.newest() <= cutoff
+            ]
+            for key in stale_keys:
+                del shard[key]
+            removed += len(stale_keys)
+    return removed
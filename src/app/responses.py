@@ -0,0 +1,16 @@
+from typing import Any
+
+import orjson
+from starlette.responses import JSONResponse
+
+
+class OrjsonResponse(JSONResponse):
+    """JSONResponse rendered with orjson, for hand-built bodies such as errors.
+
+    Routes that return a response_model don't need it: FastAPI serializes those
+    straight to JSON bytes with pydantic-core, and setting a custom default
+    response class would turn that fast path off.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
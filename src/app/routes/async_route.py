@@ -1,19 +1,28 @@
 import uuid
 
+import orjson
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 
 from app.callback import SSRFError, validate_callback_url
 from app.config import settings
 from app.database import insert_request
 from app.models import AsyncRequest, AsyncResponse
+from app.responses import OrjsonResponse
 import app.task_queue as tq_mod
 
 router = APIRouter()
 
+# Static 503 bodies, encoded once: these paths are hit hardest exactly when the server
+# is overloaded, so a rejection only wraps the bytes in a Response
+_QUEUE_NOT_READY_BODY = orjson.dumps({"detail": "Task queue not initialized"})
+_OVERLOAD_BODY = orjson.dumps({"detail": "Server overloaded — queue is full"})
+_OVERLOAD_HEADERS = {"Retry-After": "5"}
+_ACCEPTED_MESSAGE = "Request accepted. Result will be delivered to callback URL."
+
 
 @router.post("/async", response_model=AsyncResponse, status_code=202)
-async def async_endpoint(req: AsyncRequest) -> JSONResponse:
+async def async_endpoint(req: AsyncRequest) -> Response:
     """Asynchronous processing — enqueues work and delivers result via callback.
 
     Returns 202 Accepted immediately. The result will be POSTed to the
@@ -23,33 +32,31 @@ async def async_endpoint(req: AsyncRequest) -> JSONResponse:
     try:
         validate_callback_url(req.callback_url)
     except SSRFError as e:
-        return JSONResponse(status_code=400, content={"detail": f"Invalid callback URL: {e}"})
+        return OrjsonResponse(status_code=400, content={"detail": f"Invalid callback URL: {e}"})
 
-    request_id = str(uuid.uuid4())
+    request_id = uuid.uuid4().hex
     iterations = req.iterations or settings.default_iterations
 
     await insert_request(request_id, "async", req.input_data, iterations, req.callback_url)
 
     # Enqueue to task queue — returns False if queue is full (back-pressure)
     if tq_mod.task_queue is None:
-        return JSONResponse(
-            status_code=503,
-            content={"detail": "Task queue not initialized"},
-        )
+        return Response(_QUEUE_NOT_READY_BODY, status_code=503, media_type="application/json")
 
     enqueued = await tq_mod.task_queue.enqueue(request_id, req.input_data, iterations, req.callback_url)
     if not enqueued:
-        return JSONResponse(
+        return Response(
+            _OVERLOAD_BODY,
             status_code=503,
-            content={"detail": "Server overloaded — queue is full"},
-            headers={"Retry-After": "5"},
+            headers=_OVERLOAD_HEADERS,
+            media_type="application/json",
         )
 
-    return JSONResponse(
+    # Serialize the model straight to JSON bytes; no intermediate dict to re-encode
+    return Response(
+        AsyncResponse(
+            request_id=request_id, status="accepted", message=_ACCEPTED_MESSAGE
+        ).model_dump_json(),
         status_code=202,
-        content=AsyncResponse(
-            request_id=request_id,
-            status="accepted",
-            message="Request accepted. Result will be delivered to callback URL.",
-        ).model_dump(),
+        media_type="application/json",
     )
@@ -8,6 +8,11 @@ router = APIRouter()
 
 _start_time: float = 0.0
 
+# Last DB probe result as (connected, probed_at monotonic); reused for _DB_HEALTH_TTL
+# seconds so frequent health checks don't each take a pooled connection.
+_DB_HEALTH_TTL = 1.0
+_db_health: tuple[bool, float] = (False, float("-inf"))
+
 
 def set_start_time() -> None:
     global _start_time
@@ -16,16 +21,9 @@ def set_start_time() -> None:
 
 @router.get("/healthz", response_model=HealthResponse)
 async def healthz() -> HealthResponse:
-    from app.database import get_db
     import app.task_queue as tq_mod
 
-    db_connected = False
-    try:
-        db = await get_db()
-        await db.execute("SELECT 1")
-        db_connected = True
-    except Exception:
-        pass
+    db_connected = await _probe_db()
 
     return HealthResponse(
         status="ok" if db_connected else "degraded",
@@ -34,3 +32,23 @@ async def healthz() -> HealthResponse:
         db_connected=db_connected,
         uptime_seconds=round(time.monotonic() - _start_time, 2),
     )
+
+
+async def _probe_db() -> bool:
+    global _db_health
+    from app.database import read_connection
+
+    connected, probed_at = _db_health
+    now = time.monotonic()
+    if now - probed_at < _DB_HEALTH_TTL:
+        return connected
+
+    connected = False
+    try:
+        async with read_connection() as db:
+            await db.execute_fetchall("SELECT 1")
+        connected = True
+    except Exception:
+        pass
+    _db_health = (connected, now)
+    return connected
@@ -2,11 +2,11 @@ import logging
 import uuid
 
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse
 
 from app.config import settings
 from app.database import insert_request, update_request_result
 from app.models import SyncRequest, SyncResponse
+from app.responses import OrjsonResponse
 from app.work import compute_work
 
 logger = logging.getLogger(__name__)
@@ -15,13 +15,13 @@ router = APIRouter()
 
 
 @router.post("/sync", response_model=SyncResponse)
-async def sync_endpoint(req: SyncRequest) -> SyncResponse | JSONResponse:
+async def sync_endpoint(req: SyncRequest) -> SyncResponse | OrjsonResponse:
     """Synchronous processing — runs compute_work directly on the event loop.
 
     This INTENTIONALLY blocks the event loop to demonstrate the
     difference between sync and async handling under load.
     """
-    request_id = str(uuid.uuid4())
+    request_id = uuid.uuid4().hex
     iterations = req.iterations or settings.default_iterations
 
     await insert_request(request_id, "sync", req.input_data, iterations)
@@ -32,7 +32,7 @@ async def sync_endpoint(req: SyncRequest) -> SyncResponse | JSONResponse:
     except Exception:
         logger.exception("compute_work failed for request %s", request_id)
         await update_request_result(request_id, "failed", "", 0)
-        return JSONResponse(
+        return OrjsonResponse(
             status_code=500,
             content={"detail": "Work computation failed", "request_id": request_id},
         )
@@ -1,137 +1,315 @@
 import asyncio
+import itertools
 import logging
+import os
+import time
+from array import array
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
 
 from app.callback import deliver_callback
 from app.config import settings
 from app.database import update_request_result
-from app.work import compute_work
+from app.work import extend_chain, start_chain
 
 logger = logging.getLogger(__name__)
 
 task_queue: "AsyncTaskQueue | None" = None
 
+# Queued once per worker on shutdown; a worker that dequeues it exits
+_SHUTDOWN = object()
+
+# Hash rounds per turn on a compute worker. A longer chain runs in slices, each
+# rejoining the back of the intake deque, so one 1M-round task interleaves with
+# the short tasks queued behind it instead of holding a worker for seconds.
+_ROUNDS_PER_SLICE = 10_000
+
+
+class _Chain:
+    """A task part-way through its hash chain, waiting for its next slice."""
+
+    __slots__ = (
+        "callback_url",
+        "elapsed_ns",
+        "input_data",
+        "iterations",
+        "remaining",
+        "request_id",
+        "state",
+    )
+
+    def __init__(self, request_id: str, input_data: str, iterations: int, callback_url: str):
+        self.request_id = request_id
+        self.input_data = input_data
+        self.iterations = iterations
+        self.callback_url = callback_url
+        self.state: bytes | None = None  # None until the first slice has run
+        self.remaining = iterations
+        self.elapsed_ns = 0
+
+
+def _hash_thread_pinner() -> Callable[[], None] | None:
+    """Thread initializer pinning each new hash thread to the next core in turn.
+
+    Hash threads never land on the first usable core, so the event loop (itself
+    unpinned) always has one core free of hashing. Returns None where pinning is
+    unsupported (no sched_setaffinity, e.g. macOS/Windows) or only one core is
+    available.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+    cores = sorted(os.sched_getaffinity(0))[1:]
+    if not cores:
+        return None
+    next_slot = itertools.count()
+
+    def pin() -> None:
+        # pid 0 = the calling thread on Linux
+        os.sched_setaffinity(0, {cores[next(next_slot) % len(cores)]})
+
+    return pin
+
 
 class AsyncTaskQueue:
-    """Bounded async task queue with worker pool.
+    """Bounded async task queue with a two-stage worker pool.
 
-    Workers pull tasks from an asyncio.Queue, run compute_work via
-    asyncio.to_thread() (critical: don't block event loop), update the
-    DB, and deliver the callback.
+    Compute workers pull tasks from a bounded deque and hash them on the
+    queue's own thread pool (critical: don't block event loop), one slice of
+    rounds per turn. They hand each finished chain to finish workers through
+    a one-slot queue, which update the DB and deliver the callback while the
+    next hash is already running.
     """
 
     def __init__(self, max_size: int, num_workers: int) -> None:
-        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        # Intake: a plain deque plus one "not empty" event instead of asyncio.Queue,
+        # whose put/get allocate a waiter Future per hand-off. While workers are busy
+        # an enqueue is just an append. _unfinished/_drained replace Queue.join().
+        self._pending: deque = deque()
+        self._max_size = max_size
+        self._not_empty = asyncio.Event()
+        self._unfinished = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        # Compute -> finish hand-off. One slot: a compute worker runs at most one task
+        # ahead of the finish stage, so back-pressure still reaches the intake queue.
+        self._finished: asyncio.Queue = asyncio.Queue(maxsize=1)
         self._num_workers = num_workers
         self._workers: list[asyncio.Task] = []
-        self._shutdown_event = asyncio.Event()
-        self._active_count = 0
+        # Compute workers currently hashing a slice, in a preallocated C long; only
+        # touched from the event loop, so it never exceeds num_workers
+        self._active_count = array("l", [0])
+        # One thread per worker: enough to keep every worker busy without oversubscribing
+        # CPU-bound hashing the way the loop's default executor (cpu_count + 4) would.
+        # Deliberately not installed as the loop's default executor: httpx resolves
+        # hostnames through it, and lookups must not queue behind long hash chains.
+        self._hash_pool = ThreadPoolExecutor(
+            max_workers=num_workers,
+            thread_name_prefix="hash",
+            initializer=_hash_thread_pinner() if settings.pin_hash_threads else None,
+        )
 
     @property
     def queue_depth(self) -> int:
-        return self._queue.qsize()
+        return len(self._pending)
 
     @property
     def active_workers(self) -> int:
-        return self._active_count
+        return self._active_count[0]
 
     def start(self) -> None:
         for i in range(self._num_workers):
-            worker = asyncio.create_task(self._worker(i))
-            self._workers.append(worker)
-        logger.info("Started %d queue workers", self._num_workers)
+            self._workers.append(asyncio.create_task(self._compute_worker(i)))
+            self._workers.append(asyncio.create_task(self._finish_worker(i)))
+        logger.info(
+            "Started %d compute and %d finish workers", self._num_workers, self._num_workers
+        )
 
     async def enqueue(self, request_id: str, input_data: str, iterations: int, callback_url: str) -> bool:
         """Enqueue a task. Returns False if the queue is full (back-pressure)."""
-        try:
-            self._queue.put_nowait((request_id, input_data, iterations, callback_url))
-            return True
-        except asyncio.QueueFull:
+        # Resumed chains count too: a long task holds its slot until its last slice,
+        # so a stream of long tasks can't be admitted past max_size
+        if len(self._pending) >= self._max_size:
             return False
+        self._put((request_id, input_data, iterations, callback_url))
+        return True
+
+    def _put(self, item: object) -> None:
+        self._pending.append(item)
+        self._unfinished += 1
+        self._drained.clear()
+        self._not_empty.set()
+
+    def _resume(self, chain: _Chain) -> None:
+        # Same task, so not a new unfinished item. Appended even at max_size: the chain
+        # only gave its slot up while one of num_workers workers was hashing it.
+        self._pending.append(chain)
+        self._not_empty.set()
+
+    async def _get(self) -> object:
+        # Every idle worker wakes on set(); those that find the deque already
+        # emptied by a sibling clear the event and go back to waiting
+        while not self._pending:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self._pending.popleft()
+
+    def _task_done(self) -> None:
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._drained.set()
+
+    async def _compute_worker(self, worker_id: int) -> None:
+        """Stage 1: hash queued tasks a slice at a time and pass finished chains on.
 
-    async def _worker(self, worker_id: int) -> None:
-        logger.info("Worker %d started", worker_id)
-        while not self._shutdown_event.is_set():
+        A chain with rounds left after its slice goes to the back of the deque. An
+        intake task stays unfinished (no _task_done) until its finish worker is done
+        with it, so draining still waits for DB writes and callbacks.
+        """
+        logger.info("Compute worker %d started", worker_id)
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._get()
+            if item is _SHUTDOWN:
+                self._task_done()
+                await self._finished.put(_SHUTDOWN)  # stop one finish worker in turn
+                break
+
+            chain = item if isinstance(item, _Chain) else _Chain(*item)
+            rounds = min(chain.remaining, _ROUNDS_PER_SLICE)
+            start_ns = time.monotonic_ns()
+            failed = False
+            self._active_count[0] += 1
             try:
-                request_id, input_data, iterations, callback_url = await asyncio.wait_for(
-                    self._queue.get(), timeout=1.0
-                )
-            except asyncio.TimeoutError:
+                if chain.state is None:
+                    chain.state = await loop.run_in_executor(
+                        self._hash_pool, start_chain, chain.input_data, rounds
+                    )
+                else:
+                    chain.state = await loop.run_in_executor(
+                        self._hash_pool, extend_chain, chain.state, rounds
+                    )
+            except Exception:
+                logger.exception("Worker %d: hashing failed for %s", worker_id, chain.request_id)
+                failed = True
+            finally:
+                # Before any hand-off: a put blocked on the full one-slot queue isn't hashing
+                self._active_count[0] -= 1
+            if failed:
+                await self._finished.put((chain.request_id, chain.callback_url, None))
+                continue
+            chain.elapsed_ns += time.monotonic_ns() - start_ns
+            chain.remaining -= rounds
+            if chain.remaining:
+                self._resume(chain)
                 continue
 
-            self._active_count += 1
+            work_result = {
+                "result": chain.state.hex(),
+                "iterations": chain.iterations,
+                "duration_ms": chain.elapsed_ns // 10_000 / 100,
+            }
+            await self._finished.put((chain.request_id, chain.callback_url, work_result))
+
+        logger.info("Compute worker %d stopped", worker_id)
+
+    async def _finish_worker(self, worker_id: int) -> None:
+        """Stage 2: record each computed task and deliver its callback."""
+        logger.info("Finish worker %d started", worker_id)
+        while True:
+            item = await self._finished.get()
+            if item is _SHUTDOWN:
+                break
+
+            request_id, callback_url, work_result = item
             try:
-                await self._process_task(worker_id, request_id, input_data, iterations, callback_url)
+                if work_result is None:
+                    await self._handle_failure(request_id, callback_url, "Work computation failed")
+                else:
+                    await self._finish_task(worker_id, request_id, callback_url, work_result)
             finally:
-                self._active_count -= 1
-                self._queue.task_done()
+                self._task_done()
 
-        logger.info("Worker %d stopped", worker_id)
+        logger.info("Finish worker %d stopped", worker_id)
 
-    async def _process_task(
-        self, worker_id: int, request_id: str, input_data: str, iterations: int, callback_url: str
+    async def _finish_task(
+        self, worker_id: int, request_id: str, callback_url: str, work_result: dict
     ) -> None:
-        """Process a single task: compute work, update DB, deliver callback."""
-        # --- Step 1: Compute work ---
-        try:
-            work_result = await asyncio.to_thread(compute_work, input_data, iterations)
-        except Exception:
-            logger.exception("Worker %d: compute_work failed for %s", worker_id, request_id)
-            await self._handle_failure(request_id, callback_url, "Work computation failed")
-            return
-
-        # --- Step 2: Update DB ---
-        try:
-            await update_request_result(
-                request_id, "completed", work_result["result"], work_result["duration_ms"]
-            )
-        except Exception:
-            logger.exception("Worker %d: DB update failed for %s", worker_id, request_id)
-            # Still deliver callback — the work was done, even if DB is inconsistent
-
-        # --- Step 3: Deliver callback ---
-        payload = {
+        """Update DB and deliver callback for a computed task, concurrently."""
+        # Independent: the callback goes out even if the DB write fails (the work was
+        # done), so the task costs max(DB, callback) instead of their sum. A receiver
+        # that reads /requests/{id} the instant its callback lands may still see the
+        # previous status for the few ms the commit takes.
+        payload = orjson.dumps({  # encoded once, reused by every retry
             "request_id": request_id,
             "status": "completed",
             "result": work_result["result"],
             "iterations": work_result["iterations"],
             "duration_ms": work_result["duration_ms"],
-        }
-        await deliver_callback(request_id, callback_url, payload)
+        })
+        db_outcome, callback_outcome = await asyncio.gather(
+            update_request_result(
+                request_id, "completed", work_result["result"], work_result["duration_ms"]
+            ),
+            deliver_callback(request_id, callback_url, payload),
+            return_exceptions=True,
+        )
+        if isinstance(db_outcome, Exception):
+            logger.error(
+                "Worker %d: DB update failed for %s", worker_id, request_id, exc_info=db_outcome
+            )
+        if isinstance(callback_outcome, Exception):
+            logger.error(
+                "Worker %d: callback delivery failed for %s",
+                worker_id, request_id, exc_info=callback_outcome,
+            )
 
     async def _handle_failure(self, request_id: str, callback_url: str, error_msg: str) -> None:
-        """Update DB to failed and deliver error callback."""
-        try:
-            await update_request_result(request_id, "failed", "", 0)
-        except Exception:
-            logger.exception("Failed to update error status for %s", request_id)
-
+        """Update DB to failed and deliver error callback, concurrently."""
         # Deliver error callback so the client knows about the failure
-        error_payload = {
+        error_payload = orjson.dumps({
             "request_id": request_id,
             "status": "failed",
             "error": error_msg,
-        }
-        try:
-            await deliver_callback(request_id, callback_url, error_payload)
-        except Exception:
-            logger.exception("Failed to deliver error callback for %s", request_id)
+        })
+        db_outcome, callback_outcome = await asyncio.gather(
+            update_request_result(request_id, "failed", "", 0),
+            deliver_callback(request_id, callback_url, error_payload),
+            return_exceptions=True,
+        )
+        if isinstance(db_outcome, Exception):
+            logger.error("Failed to update error status for %s", request_id, exc_info=db_outcome)
+        if isinstance(callback_outcome, Exception):
+            logger.error(
+                "Failed to deliver error callback for %s", request_id, exc_info=callback_outcome
+            )
 
     async def shutdown(self, timeout: float = 30.0) -> None:
-        """Graceful shutdown: signal workers, drain queue, cancel stragglers."""
+        """Graceful shutdown: drain queue, then stop workers (cancel them if the drain timed out)."""
         logger.info("Shutting down task queue...")
-        self._shutdown_event.set()
 
         # Wait for queue to drain
         try:
-            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            await asyncio.wait_for(self._drained.wait(), timeout=timeout)
             logger.info("Queue drained successfully")
+            drained = True
         except asyncio.TimeoutError:
             logger.warning("Queue drain timed out after %.1fs", timeout)
+            drained = False
 
-        # Cancel workers
-        for w in self._workers:
-            w.cancel()
+        # One sentinel per compute worker wakes each idle worker so it exits on its own;
+        # each compute worker forwards its sentinel to stop one finish worker
+        if drained:
+            for _ in range(self._num_workers):
+                self._put(_SHUTDOWN)  # bypasses max_size
+        else:
+            for w in self._workers:
+                w.cancel()
         await asyncio.gather(*self._workers, return_exceptions=True)
+        # Don't block the loop on a hash still running after a timed-out drain
+        self._hash_pool.shutdown(wait=False, cancel_futures=True)
         logger.info("All workers stopped")
 
 
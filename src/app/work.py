@@ -5,17 +5,40 @@ import time
 def compute_work(input_data: str, iterations: int) -> dict:
     """Run N rounds of SHA-256 hashing.
 
-    Deterministic and CPU-bound. hashlib uses OpenSSL under the hood,
-    which releases the GIL during computation — enabling real parallelism
-    via asyncio.to_thread().
+    Deterministic and CPU-bound. hashlib uses OpenSSL under the hood, but
+    only releases the GIL for inputs of 2 KiB or more; every round after the
+    first hashes a 32-byte digest, so the loop holds the GIL. Running it on
+    the task queue's thread pool keeps the event loop responsive (the
+    interpreter switches threads every few ms), not parallel across cores.
     """
-    start = time.monotonic()
-    digest = input_data.encode("utf-8")
-    for _ in range(iterations):
-        digest = hashlib.sha256(digest).digest()
-    elapsed_ms = round((time.monotonic() - start) * 1000, 2)
+    start_ns = time.monotonic_ns()
+    digest = start_chain(input_data, iterations)
     return {
         "result": digest.hex(),
         "iterations": iterations,
-        "duration_ms": elapsed_ms,
+        # Integer ns -> ms truncated to 2 places: no float subtraction or round()
+        "duration_ms": (time.monotonic_ns() - start_ns) // 10_000 / 100,
     }
+
+
+def start_chain(input_data: str, rounds: int) -> bytes:
+    """Chain state after the first `rounds` rounds of compute_work for this input.
+
+    compute_work(input_data, n)["result"] == start_chain(input_data, n).hex(), and a
+    chain can be continued in slices with extend_chain.
+    """
+    return _hash_rounds(input_data.encode("utf-8"), rounds)
+
+
+def extend_chain(state: bytes, rounds: int) -> bytes:
+    """Continue a chain from `state` by `rounds` more rounds."""
+    return _hash_rounds(state, rounds)
+
+
+def _hash_rounds(digest: bytes, rounds: int) -> bytes:
+    # Bind the constructor to a local: the loop body is then one fast local load
+    # plus the two C calls, with no module/attribute lookup per round
+    sha256 = hashlib.sha256
+    for _ in range(rounds):
+        digest = sha256(digest).digest()
+    return digest
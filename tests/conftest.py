@@ -12,6 +12,7 @@ os.environ["CONSUMA_MAX_QUEUE_SIZE"] = "10"
 os.environ["CONSUMA_CALLBACK_MAX_RETRIES"] = "2"
 os.environ["CONSUMA_RATE_LIMIT_REQUESTS"] = "1000"
 
+from app.callback import close_callback_client  # noqa: E402
 from app.database import close_db, init_db  # noqa: E402
 from app.main import app  # noqa: E402
 from app.routes.health import set_start_time  # noqa: E402
@@ -36,8 +37,12 @@ async def setup_and_teardown():
     yield
 
     if tq_mod.task_queue is not None:
-        await tq_mod.task_queue.shutdown(timeout=5)
+        # Don't drain: leftover tasks are only callbacks backing off against unreachable
+        # test URLs (or, after the 503 test, tasks with no workers left to run them).
+        # Whatever a test asserts on, it has already awaited itself.
+        await tq_mod.task_queue.shutdown(timeout=0)
         tq_mod.task_queue = None
+    await close_callback_client()
     await close_db()
 
     try:
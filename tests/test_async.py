@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 
 
@@ -37,3 +39,30 @@ async def test_async_request_in_list(client):
     body = detail.json()
     assert body["id"] == request_id
     assert body["mode"] == "async"
+
+
+@pytest.mark.asyncio
+async def test_async_failed_delivery_recorded_in_trace(client, monkeypatch):
+    """A callback attempt against a dead endpoint should show up in delivery_trace."""
+    async def no_backoff(seconds: float) -> None:
+        pass
+
+    monkeypatch.setattr("app.callback._sleep", no_backoff)
+    resp = await client.post("/async", json={
+        "input_data": "trace-attempts",
+        "iterations": 10,
+        "callback_url": "http://127.0.0.1:9/callback",
+    })
+    request_id = resp.json()["request_id"]
+
+    # Attempt rows are written together, by finalize_callback, once delivery gives up
+    trace = []
+    for _ in range(50):
+        await asyncio.sleep(0.05)
+        trace = (await client.get(f"/requests/{request_id}")).json()["delivery_trace"]
+        if trace:
+            break
+    assert trace
+    assert trace[0]["attempt_number"] == 1
+    assert trace[0]["status_code"] is None
+    assert trace[0]["error"]
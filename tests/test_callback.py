@@ -1,6 +1,6 @@
 import pytest
 
-from app.callback import SSRFError, validate_callback_url
+from app.callback import SSRFError, _is_private_ip, validate_callback_url
 
 
 def test_ssrf_blocks_private_ips():
@@ -51,3 +51,18 @@ def test_ssrf_rejects_invalid_scheme():
 def test_ssrf_rejects_no_hostname():
     with pytest.raises(SSRFError, match="No hostname"):
         validate_callback_url("http:///callback")
+
+
+def test_private_ip_ranges_boundaries():
+    """Addresses just inside/outside each private range are classified correctly."""
+    assert _is_private_ip("172.16.0.1")
+    assert _is_private_ip("172.31.255.255")
+    assert not _is_private_ip("172.32.0.1")
+    assert _is_private_ip("169.254.169.254")
+    assert not _is_private_ip("8.8.8.8")
+    assert _is_private_ip("::1")
+    assert _is_private_ip("fd12:3456::1")
+    assert _is_private_ip("febf::1")
+    assert not _is_private_ip("fec0::1")
+    assert not _is_private_ip("2001:4860:4860::8888")
+    assert _is_private_ip("not-an-ip")
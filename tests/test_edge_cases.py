@@ -45,6 +45,50 @@ async def test_queue_full_returns_503(client):
     assert "Retry-After" in resp.headers
 
 
+@pytest.mark.asyncio
+async def test_long_tasks_still_hit_503_with_workers_running(client):
+    """Long tasks hashed in slices keep their queue slot, so back-pressure still applies."""
+    import app.task_queue as tq_mod
+
+    statuses = []
+    for i in range(40):
+        resp = await client.post("/async", json={
+            "input_data": f"long-{i}",
+            "iterations": 1_000_000,
+            "callback_url": "http://localhost:9999/callback",
+        })
+        statuses.append(resp.status_code)
+        assert tq_mod.task_queue.queue_depth <= 10
+        assert tq_mod.task_queue.active_workers <= 2
+
+    assert 503 in statuses
+    # max_size 10 queued + 2 mid-slice; none of the 1M-round tasks can have finished
+    assert statuses.count(202) <= 12
+
+
+def test_hash_thread_pinner_skips_first_core(monkeypatch):
+    """Hash threads are pinned round-robin to every core but the first; one core = no-op."""
+    import os
+
+    from app.task_queue import _hash_thread_pinner
+
+    pinned = []
+
+    def record(pid, cores):
+        pinned.append(cores)
+
+    monkeypatch.setattr(os, "sched_setaffinity", record, raising=False)
+
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 2, 5}, raising=False)
+    pin = _hash_thread_pinner()
+    for _ in range(3):
+        pin()
+    assert pinned == [{2}, {5}, {2}]
+
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {3}, raising=False)
+    assert _hash_thread_pinner() is None
+
+
 @pytest.mark.asyncio
 async def test_callback_url_too_long_rejected(client):
     """Callback URL exceeding 2048 chars should be rejected by validation."""
@@ -185,3 +229,62 @@ async def test_async_callback_url_invalid_scheme(client):
     })
     assert resp.status_code == 400
     assert "ssrf" in resp.json()["detail"].lower() or "scheme" in resp.json()["detail"].lower()
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_returns_429_after_window_is_full():
+    """The N+1th request in a window gets 429 with Retry-After; /healthz is exempt."""
+    from fastapi import FastAPI
+    from httpx import ASGITransport, AsyncClient
+
+    import app.rate_limit as rl_mod
+
+    limited = FastAPI()
+    limited.add_middleware(rl_mod.SlidingWindowRateLimiter, max_requests=3, window_seconds=60)
+
+    @limited.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @limited.get("/healthz")
+    async def healthz():
+        return {"ok": True}
+
+    transport = ASGITransport(app=limited)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for _ in range(3):
+            assert (await ac.get("/ping")).status_code == 200
+        resp = await ac.get("/ping")
+        assert resp.status_code == 429
+        assert 1 <= int(resp.headers["Retry-After"]) <= 61
+        assert (await ac.get("/healthz")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_rate_limiters_with_different_limits_keep_separate_buckets():
+    """Two limiters seeing the same client IP each enforce their own max_requests."""
+    from fastapi import FastAPI
+    from httpx import ASGITransport, AsyncClient
+
+    from app.rate_limit import SlidingWindowRateLimiter
+
+    def limited_app(max_requests: int) -> FastAPI:
+        app = FastAPI()
+        app.add_middleware(SlidingWindowRateLimiter, max_requests=max_requests, window_seconds=60)
+
+        @app.get("/ping")
+        async def ping():
+            return {"ok": True}
+
+        return app
+
+    strict = AsyncClient(transport=ASGITransport(app=limited_app(3)), base_url="http://test")
+    loose = AsyncClient(transport=ASGITransport(app=limited_app(500)), base_url="http://test")
+    async with strict, loose:
+        # The loose limiter must not reuse (and overrun) the strict one's 3-slot bucket
+        for _ in range(3):
+            assert (await strict.get("/ping")).status_code == 200
+        for _ in range(10):
+            assert (await loose.get("/ping")).status_code == 200
+        # ...nor inflate it: the strict limiter still stops its 4th request
+        assert (await strict.get("/ping")).status_code == 429
@@ -1,4 +1,4 @@
-from app.work import compute_work
+from app.work import compute_work, extend_chain, start_chain
 
 
 def test_compute_work_deterministic():
@@ -27,3 +27,21 @@ def test_compute_work_duration():
     """Duration should be a non-negative float."""
     result = compute_work("test", 10)
     assert result["duration_ms"] >= 0
+
+
+def test_compute_work_matches_plain_hash_chain():
+    """Results equal a plain SHA-256 chain over the UTF-8 input."""
+    import hashlib
+
+    expected = b"chain"
+    for _ in range(1_003):
+        expected = hashlib.sha256(expected).digest()
+    assert compute_work("chain", 1_003)["result"] == expected.hex()
+
+
+def test_chain_in_slices_matches_compute_work():
+    """A chain hashed slice by slice ends where compute_work does in one go."""
+    state = start_chain("sliced", 4_000)
+    for rounds in (4_000, 4_000, 500):
+        state = extend_chain(state, rounds)
+    assert state.hex() == compute_work("sliced", 12_500)["result"]